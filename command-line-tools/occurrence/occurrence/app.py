@@ -1,12 +1,22 @@
 import click
+import dask
+import math
 import os
 import pystac
 from loguru import logger
-import shutil
+import rasterio
+import threading
 import xarray as xr
 import rio_stac
-import pandas as pd
+import rioxarray  # noqa: F401
 from pystac import Catalog, Collection, Asset
+from pystac.extensions.raster import (
+    DataType,
+    RasterBand,
+    RasterExtension,
+    Sampling,
+    Statistics,
+)
 
 from affine import Affine
 from pyproj import CRS
@@ -14,6 +24,8 @@ from pyproj import CRS
 from odc.geo import GeoBox
 from odc.geo.crs import CRS as OdcCRS
 
+RASTER_BLOCK_SIZE = 256
+
 
 def attach_geobox_to_xarray(da: xr.DataArray, asset: Asset) -> xr.DataArray:
     """
@@ -81,6 +93,59 @@ def crs_from_stac_asset(asset: Asset) -> CRS:
     return CRS.from_user_input(epsg)
 
 
+def write_raster(da: xr.DataArray, path: str, compute: bool = True):
+    """
+    Write a Dask-backed DataArray to a tiled, ZSTD-compressed GeoTIFF block by block.
+
+    The array is rechunked onto the GeoTIFF tile grid and handed to Dask with
+    a write lock, so each chunk is computed and flushed independently instead
+    of materializing the whole raster in memory. With compute=False the
+    Dask store task is returned so it can share a graph with other reductions.
+    """
+
+    da = da.chunk({"y": RASTER_BLOCK_SIZE, "x": RASTER_BLOCK_SIZE})
+    return da.rio.to_raster(
+        path,
+        tiled=True,
+        blockxsize=RASTER_BLOCK_SIZE,
+        blockysize=RASTER_BLOCK_SIZE,
+        compress="ZSTD",
+        zstd_level=3,
+        predictor=3,
+        interleave="band",
+        BIGTIFF="IF_SAFER",
+        lock=threading.Lock(),
+        compute=compute,
+    )
+
+
+def raster_band_from_statistics(path: str, statistics: Statistics) -> RasterBand:
+    """
+    Build a STAC raster band for a GeoTIFF from precomputed statistics.
+
+    Only the file header is read: the data type, scale, offset, sampling,
+    nodata, unit and resolution come from the written raster, as rio-stac
+    would report them, while the statistics come from the Dask reductions.
+    """
+
+    with rasterio.open(path) as src:
+        band = RasterBand.create(
+            data_type=DataType(src.dtypes[0]),
+            scale=src.scales[0],
+            offset=src.offsets[0],
+            spatial_resolution=src.res[0],
+            unit=src.units[0],
+            statistics=statistics,
+        )
+        area_or_point = src.tags().get("AREA_OR_POINT", "").lower()
+        if area_or_point:
+            band.sampling = Sampling(area_or_point)
+        if src.nodata is not None:
+            band.nodata = "nan" if math.isnan(src.nodata) else src.nodata
+
+    return band
+
+
 @click.command(
     short_help="Derives water occurrence from datacube encoded in the Zarr format",
     help="Creates a zarr from STAC catalog with the water bodies",
@@ -104,33 +169,57 @@ def occurrence(stac_catalog):
 
     measurements: Asset = collection.get_assets()["measurements"]
 
-    water_bodies = xr.open_zarr(measurements.get_absolute_href(), consolidated=False)[
-        "water-bodies"
-    ]
+    # a single chunk along time turns the mean into one blockwise pass per tile
+    water_bodies = xr.open_zarr(
+        measurements.get_absolute_href(),
+        consolidated=True,
+        chunks={"time": -1},
+    )["water-bodies"]
+
+    item_id = "occurrence"
+    os.makedirs(item_id, exist_ok=True)
+    out_path = os.path.join(item_id, "water_bodies_mean.tif")
 
     mean = water_bodies.mean("time")
     mean = attach_geobox_to_xarray(mean, asset=measurements)
-    mean.rio.to_raster("water_bodies_mean.tif")
+
+    # a single compute shares the mean chunks between the GeoTIFF write and
+    # the band statistics, so the raster is not read back to derive them
+    _, minimum, maximum, mean_value, stddev, valid_fraction = dask.compute(
+        write_raster(mean, out_path, compute=False),
+        mean.min(),
+        mean.max(),
+        mean.mean(),
+        mean.std(),
+        mean.notnull().mean(),
+    )
 
     logger.info("Creating a STAC Catalog for the output")
     cat = pystac.Catalog(id="catalog", description="water-bodies-mean")
 
-    item_id = "occurrence"
-    os.makedirs(item_id, exist_ok=True)
-    shutil.copy("water_bodies_mean.tif", item_id)
-
     out_item = rio_stac.stac.create_stac_item(
-        source="water_bodies_mean.tif",
+        source=out_path,
         input_datetime=collection.extent.temporal.intervals[0][1],
         id=item_id,
         asset_roles=["data", "visual"],
-        asset_href=os.path.basename("water_bodies_mean.tif"),
+        asset_href=os.path.basename(out_path),
         asset_name="data",
         with_proj=True,
-        with_raster=True,
+        with_raster=False,
     )
 
-    os.remove("water_bodies_mean.tif")
+    RasterExtension.ext(out_item.assets["data"], add_if_missing=True).bands = [
+        raster_band_from_statistics(
+            out_path,
+            Statistics.create(
+                minimum=float(minimum),
+                maximum=float(maximum),
+                mean=float(mean_value),
+                stddev=float(stddev),
+                valid_percent=float(valid_fraction) * 100,
+            ),
+        )
+    ]
 
     cat.add_items([out_item])
 
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List
 
+import numpy as np
 from pystac import Item
 
 
@@ -14,13 +15,11 @@ def get_temporal_extent(items: List[Item]) -> List[datetime]:
 
 def get_spatial_extent(items: List[Item]) -> List[float]:
     """Get spatial extent from a list of STAC items."""
-    bboxes = [item.bbox for item in items if item.bbox]
-    if not bboxes:
+    bboxes = np.asarray([item.bbox[:4] for item in items if item.bbox], dtype=np.float64)
+    if not bboxes.size:
         raise ValueError("No bbox found in item properties")
-    min_x = min(bbox[0] for bbox in bboxes)
-    min_y = min(bbox[1] for bbox in bboxes)
-    max_x = max(bbox[2] for bbox in bboxes)
-    max_y = max(bbox[3] for bbox in bboxes)
+    min_x, min_y = bboxes[:, :2].min(axis=0).tolist()
+    max_x, max_y = bboxes[:, 2:].max(axis=0).tolist()
     return [min_x, min_y, max_x, max_y]
 
 
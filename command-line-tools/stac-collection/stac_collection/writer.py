@@ -1,5 +1,7 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
 import rio_stac
@@ -19,6 +21,10 @@ from pystac.media_type import MediaType
 
 from stac_collection.contract import get_spatial_extent, get_temporal_extent, validate_parallel_inputs
 
+# each item copies its two GeoTIFFs and has rio_stac compute raster statistics
+# from them; shutil and GDAL release the GIL while doing so
+MAX_WORKERS = 32
+
 
 def _read_input_item(item_url: str) -> Item:
     if os.path.isdir(item_url):
@@ -27,6 +33,40 @@ def _read_input_item(item_url: str) -> Item:
     return read_file(item_url)
 
 
+def _create_output_item(item_url: str, otsu_mask: str, ndwi_image: str, asset_root: Path) -> Item:
+    item = _read_input_item(item_url)
+
+    asset_path: Path = asset_root / item.id
+    asset_path.mkdir(parents=True, exist_ok=True)
+    shutil.copy(otsu_mask, asset_path / os.path.basename(otsu_mask))
+    shutil.copy(ndwi_image, asset_path / "ndwi.tif")
+
+    out_item = rio_stac.stac.create_stac_item(
+        source=otsu_mask,
+        input_datetime=item.datetime,
+        id=item.id,
+        asset_roles=["data", "visual"],
+        asset_href=os.path.basename(otsu_mask),
+        asset_name="water-bodies",
+        with_proj=True,
+        with_raster=True,
+    )
+
+    temp_item = rio_stac.stac.create_stac_item(
+        source=str(asset_path / "ndwi.tif"),
+        input_datetime=item.datetime,
+        id=item.id,
+        asset_roles=["data", "visual"],
+        asset_href="ndwi.tif",
+        asset_name="ndwi",
+        with_proj=True,
+        with_raster=True,
+    )
+
+    out_item.add_asset("ndwi", temp_item.assets["ndwi"])
+    return out_item
+
+
 def run_to_stac(
     item_urls: tuple[str, ...],
     otsu: tuple[str, ...],
@@ -40,44 +80,12 @@ def run_to_stac(
     cat: Catalog = Catalog(id="catalog", description="water-bodies")
 
     collection_id = "water-bodies"
-    out_items = []
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    for index, item_url in enumerate(item_urls):
-        item = _read_input_item(item_url)
-        otsu_mask = otsu[index]
-        ndwi_image = ndwi[index]
-
-        asset_path: Path = output_dir / collection_id / item.id
-        asset_path.mkdir(parents=True, exist_ok=True)
-        shutil.copy(otsu_mask, asset_path / os.path.basename(otsu_mask))
-        shutil.copy(ndwi_image, asset_path / "ndwi.tif")
-
-        out_item = rio_stac.stac.create_stac_item(
-            source=otsu_mask,
-            input_datetime=item.datetime,
-            id=item.id,
-            asset_roles=["data", "visual"],
-            asset_href=os.path.basename(otsu_mask),
-            asset_name="water-bodies",
-            with_proj=True,
-            with_raster=True,
-        )
-
-        temp_item = rio_stac.stac.create_stac_item(
-            source=str(asset_path / "ndwi.tif"),
-            input_datetime=item.datetime,
-            id=item.id,
-            asset_roles=["data", "visual"],
-            asset_href="ndwi.tif",
-            asset_name="ndwi",
-            with_proj=True,
-            with_raster=True,
-        )
-
-        out_item.add_asset("ndwi", temp_item.assets["ndwi"])
-        out_items.append(out_item)
+    create_output_item = partial(_create_output_item, asset_root=output_dir / collection_id)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(item_urls)))) as executor:
+        out_items = list(executor.map(create_output_item, item_urls, otsu, ndwi))
 
     logger.info("Creating STAC Collection...")
     collection: Collection = Collection(
@@ -1,7 +1,9 @@
 from stac_eopf_product.cli import to_eopf
 from stac_eopf_product.contract import (
     extract_crs,
+    get_chunk_side,
     get_asset_keys,
+    get_measurement_itemsize,
     get_measurement_keys,
     get_spatial_extent,
     get_temporal_extent,
@@ -53,6 +53,19 @@ from stac_eopf_product.writer import run_to_eopf
     show_default=True,
     help="Chunk size along time dimension when --chunks=manual.",
 )
+@click.option(
+    "--chunk-mb",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Target uncompressed chunk size in MiB when --chunks=manual; overrides --chunk-x/--chunk-y.",
+)
+@click.option(
+    "--groupby",
+    type=click.Choice(("time", "solar_day"), case_sensitive=False),
+    default="time",
+    show_default=True,
+    help="How items are grouped into time slices. 'solar_day' merges same-day scenes.",
+)
 def to_eopf(
     stac_catalog: Path,
     resolution: float | None,
@@ -60,6 +73,8 @@ def to_eopf(
     chunk_x: int,
     chunk_y: int,
     chunk_time: int,
+    chunk_mb: float | None,
+    groupby: str,
 ) -> None:
     run_to_eopf(
         stac_catalog=stac_catalog,
@@ -68,4 +83,6 @@ def to_eopf(
         chunk_x=chunk_x,
         chunk_y=chunk_y,
         chunk_time=chunk_time,
+        chunk_mb=chunk_mb,
+        groupby=groupby.lower(),
     )
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Tuple
 
 from pystac import Collection, Extent, SpatialExtent, TemporalExtent
@@ -37,29 +37,34 @@ def get_measurement_text(collection: Collection, measurement: str) -> Tuple[str,
     return title, description
 
 
+def to_utc_isoformat(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def get_coordinate_extent(dataset: Dataset, name: str) -> List[float]:
+    values = getattr(dataset, name).values
+    return [float(values.min()), float(values.max())]
+
+
 def build_cube_dimensions(dataset: Dataset, temporal_extent: List[datetime]) -> dict:
     return {
         "time": {
             "type": "temporal",
             "extent": [
-                temporal_extent[0].isoformat() + "Z",
-                temporal_extent[1].isoformat() + "Z",
+                to_utc_isoformat(temporal_extent[0]),
+                to_utc_isoformat(temporal_extent[1]),
             ],
         },
         "x": {
             "type": "spatial",
             "axis": "x",
-            "extent": [
-                float(min(dataset.x.values)),
-                float(max(dataset.x.values)),
-            ],
+            "extent": get_coordinate_extent(dataset, "x"),
         },
         "y": {
             "type": "spatial",
             "axis": "y",
-            "extent": [
-                float(min(dataset.y.values)),
-                float(max(dataset.y.values)),
-            ],
+            "extent": get_coordinate_extent(dataset, "y"),
         },
     }
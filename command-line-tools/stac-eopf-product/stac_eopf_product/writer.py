@@ -5,9 +5,11 @@ from typing import Any, Dict, List
 import eopf.common.constants as c
 import numpy as np
 import pystac
+import zarr
 from eopf.product import EOGroup, EOProduct, EOVariable
 from eopf.store.zarr import EOZarrStore
 from loguru import logger
+from numcodecs import Blosc
 from odc.stac import stac_load
 from pystac import (
     Asset,
@@ -25,6 +27,8 @@ from xarray import DataArray, Dataset
 
 from stac_eopf_product.contract import (
     extract_crs,
+    get_chunk_side,
+    get_measurement_itemsize,
     get_measurement_keys,
     get_spatial_extent,
     get_temporal_extent,
@@ -36,6 +40,13 @@ from stac_eopf_product.metadata import (
     get_measurement_text,
 )
 
+LOAD_POOL_SIZE = 32
+
+# EOZarrStore's own default, pinned so the product encoding does not drift
+# with eopf releases. zstd level 5 saves only ~0.3% (NDWI) to ~4% (masks)
+# per chunk for 30-85% more encode time, so the level stays at 3.
+ZARR_COMPRESSOR = Blosc(cname="zstd", clevel=3, shuffle=Blosc.BITSHUFFLE)
+
 DTYPE_TO_RASTER = {
     np.dtype("int8"): DataType.INT8,
     np.dtype("int16"): DataType.INT16,
@@ -55,13 +66,13 @@ def to_raster_datatype(dtype: np.dtype) -> DataType:
     return DTYPE_TO_RASTER.get(np.dtype(dtype), DataType.OTHER)
 
 
-def raster_band_from_dataarray(da: DataArray) -> RasterBand:
-    nodata = da.encoding.get("_FillValue") or da.attrs.get("_FillValue") or da.attrs.get("nodata")
-    scale = da.encoding.get("scale_factor") or da.attrs.get("scale_factor")
-    offset = da.encoding.get("add_offset") or da.attrs.get("add_offset")
-    unit = da.attrs.get("units")
-    spatial_resolution = None
-    if hasattr(da, "rio"):
+def raster_band_from_dataarray(da: DataArray, spatial_resolution: float | None = None) -> RasterBand:
+    encoding, attrs = da.encoding, da.attrs
+    nodata = encoding.get("_FillValue") or attrs.get("_FillValue") or attrs.get("nodata")
+    scale = encoding.get("scale_factor") or attrs.get("scale_factor")
+    offset = encoding.get("add_offset") or attrs.get("add_offset")
+    unit = attrs.get("units")
+    if spatial_resolution is None and hasattr(da, "rio"):
         try:
             xres, _yres = da.rio.resolution()
             spatial_resolution = abs(xres)
@@ -86,14 +97,18 @@ def build_stac_load_kwargs(
     chunk_x: int,
     chunk_y: int,
     chunk_time: int,
+    groupby: str = "time",
 ) -> Dict[str, Any]:
     kwargs: Dict[str, Any] = {
         "bands": bands,
         "crs": crs,
-        "groupby": "time",
+        "groupby": groupby,
     }
     if chunks == "manual":
         kwargs["chunks"] = {"x": chunk_x, "y": chunk_y, "time": chunk_time}
+    else:
+        # without Dask chunks odc.stac loads eagerly; read the assets concurrently
+        kwargs["pool"] = LOAD_POOL_SIZE
     if resolution is not None:
         kwargs["resolution"] = resolution
     return kwargs
@@ -106,6 +121,8 @@ def run_to_eopf(
     chunk_x: int = 512,
     chunk_y: int = 512,
     chunk_time: int = 1,
+    chunk_mb: float | None = None,
+    groupby: str = "time",
 ) -> None:
     logger.info(f"Reading STAC catalog from {stac_catalog}...")
     catalog: STACObject = read_stac_file(os.path.join(stac_catalog, "catalog.json"))
@@ -121,7 +138,7 @@ def run_to_eopf(
             f"{stac_catalog} does not contain a valid STAC Collection instance, found {type(collection)}"
         )
 
-    items: List[Item] = list(collection.get_all_items())
+    items: List[Item] = list(collection.get_items())
     logger.info(f"Found {len(items)} STAC Items in {stac_catalog} STAC Catalog")
     if not items:
         raise ValueError("Input STAC Collection has no items")
@@ -130,6 +147,11 @@ def run_to_eopf(
     temporal_extent = get_temporal_extent(items)
     measurement_keys = get_measurement_keys(collection)
     validate_items_have_measurements(items, measurement_keys)
+    if chunks == "manual" and chunk_mb is not None:
+        chunk_x = chunk_y = get_chunk_side(
+            chunk_mb, get_measurement_itemsize(items[0], measurement_keys), chunk_time
+        )
+        logger.info(f"Using {chunk_x}x{chunk_y} spatial chunks for ~{chunk_mb} MiB per chunk")
 
     stac_catalog_dataset: Dataset = stac_load(
         items,
@@ -141,6 +163,7 @@ def run_to_eopf(
             chunk_x=chunk_x,
             chunk_y=chunk_y,
             chunk_time=chunk_time,
+            groupby=groupby,
         ),
     )
 
@@ -166,34 +189,43 @@ def run_to_eopf(
         )
     )
 
-    spatial_bbox = [
-        float(min(stac_catalog_dataset.x.values)),
-        float(min(stac_catalog_dataset.y.values)),
-        float(max(stac_catalog_dataset.x.values)),
-        float(max(stac_catalog_dataset.y.values)),
-    ]
+    # odc.stac coordinates are in-memory; scan them once and share the result
+    # between the projection bbox and every asset's cube:dimensions
+    cube_dimensions = build_cube_dimensions(stac_catalog_dataset, temporal_extent)
+    x_min, x_max = cube_dimensions["x"]["extent"]
+    y_min, y_max = cube_dimensions["y"]["extent"]
+    spatial_bbox = [x_min, y_min, x_max, y_max]
+
+    # the grid is shared by every measurement: derive it and its footprint once
+    gbox = stac_catalog_dataset.odc.geobox
+    geometry = gbox.extent.to_crs(crs).json
+    height, width = gbox.shape
+    spatial_resolution = abs(gbox.resolution.x)
 
     product: EOProduct = EOProduct(name=collection.id)
     product["measurements"] = EOGroup()
 
     for measurement in measurement_keys:
         da: DataArray = stac_catalog_dataset[measurement]
+        title, description = get_measurement_text(collection, measurement)
+        # hand over the DataArray itself so its coordinates are written with
+        # the variable and the Dask graph is reused as is
         product[f"measurements/{measurement}"] = EOVariable(
-            data=da.data,
-            dims=stac_catalog_dataset[measurement].dims,
+            data=da,
+            dims=da.dims,
             attrs={
-                "description": get_measurement_text(collection, measurement)[1],
+                **da.attrs,
+                "description": description,
             },
         )
 
-        title, description = get_measurement_text(collection, measurement)
-
         zarr_asset = Asset(
             href=f"{zarr_store}.zarr/measurements",
             media_type="application/vnd.zarr; version=2",
             roles=["data", "zarr"],
             title=title,
             description=description,
+            extra_fields={"xarray:open_kwargs": {"consolidated": True}},
         )
         output_collection.add_asset(key=measurement, asset=zarr_asset)
 
@@ -204,18 +236,18 @@ def run_to_eopf(
                 "dimensions": list(stac_catalog_dataset[measurement].dims),
             }
         }
-        zarr_asset.extra_fields["cube:dimensions"] = build_cube_dimensions(
-            stac_catalog_dataset, temporal_extent
-        )
+        zarr_asset.extra_fields["cube:dimensions"] = cube_dimensions
 
         proj_ext = ProjectionExtension.ext(zarr_asset)
-        gbox = stac_catalog_dataset.odc.geobox
         proj_ext.epsg = gbox.crs.epsg
         proj_ext.bbox = spatial_bbox
-        proj_ext.geometry = gbox.extent.to_crs(crs).json
-        height, width = gbox.shape
+        proj_ext.geometry = geometry
         proj_ext.shape = [height, width]
 
+        RasterExtension.ext(zarr_asset, add_if_missing=True).bands = [
+            raster_band_from_dataarray(da, spatial_resolution=spatial_resolution)
+        ]
+
     output_cat = Catalog(id=collection.id, description=collection.description, title=collection.title)
     output_cat.add_child(output_collection)
     output_cat.normalize_and_save(root_href=str(Path(".")), catalog_type=CatalogType.SELF_CONTAINED)
@@ -225,6 +257,18 @@ def run_to_eopf(
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info(f"Writing EOPF Zarr product to {output_dir}")
 
-    with EOZarrStore(url=output_dir.absolute().as_uri()).open(mode=c.OpeningMode.CREATE_OVERWRITE) as store:
+    # only the NaN-filled NDWI benefits: its all-NaN chunks outside the footprint
+    # are not written and read back as NaN. The uint8 masks carry no fill value
+    # (a 0 fill would make xarray decode every dry pixel as NaN), so their
+    # all-zero chunks are still written
+    with EOZarrStore(url=output_dir.absolute().as_uri()).open(
+        mode=c.OpeningMode.CREATE_OVERWRITE,
+        compressor=ZARR_COMPRESSOR,
+        to_zarr_kwargs={"write_empty_chunks": False},
+    ) as store:
         store[zarr_store] = product
+
+    # EOZarrStore only consolidates the product root; the assets point at the
+    # measurements group, so give it its own consolidated metadata too
+    zarr.consolidate_metadata(str(output_dir / f"{zarr_store}.zarr" / "measurements"))
     logger.info("Done writing EOPF product!")
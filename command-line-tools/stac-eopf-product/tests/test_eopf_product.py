@@ -4,6 +4,7 @@ from types import SimpleNamespace
 
 import numpy as np
 import pytest
+from numcodecs import Blosc
 from pystac import Asset, Catalog, Collection, Extent, Item, SpatialExtent, TemporalExtent
 from pystac.extensions.raster import DataType
 from xarray import DataArray
@@ -11,13 +12,16 @@ from xarray import DataArray
 from stac_eopf_product.app import (
     build_stac_load_kwargs,
     extract_crs,
+    get_chunk_side,
+    get_measurement_itemsize,
     get_measurement_keys,
     get_spatial_extent,
     get_temporal_extent,
     to_raster_datatype,
     validate_items_have_measurements,
 )
-from stac_eopf_product.writer import run_to_eopf
+from stac_eopf_product.metadata import build_cube_dimensions, get_coordinate_extent
+from stac_eopf_product.writer import LOAD_POOL_SIZE, run_to_eopf
 
 
 def _make_item(item_id: str, bbox, dt: datetime, properties=None) -> Item:
@@ -55,6 +59,27 @@ def test_extract_crs_uses_proj_code():
     assert extract_crs(item) == "epsg:32633"
 
 
+def test_extract_crs_proj_code_is_case_insensitive():
+    item = _make_item(
+        "a",
+        [0, 0, 1, 1],
+        datetime(2021, 1, 1, tzinfo=timezone.utc),
+        properties={"proj:code": "Epsg:32633"},
+    )
+    assert extract_crs(item) == "epsg:32633"
+
+
+def test_extract_crs_rejects_non_epsg_code():
+    item = _make_item(
+        "a",
+        [0, 0, 1, 1],
+        datetime(2021, 1, 1, tzinfo=timezone.utc),
+        properties={"proj:code": "EPSG:utm33n"},
+    )
+    with pytest.raises(ValueError, match="CRS not found"):
+        extract_crs(item)
+
+
 def test_get_extents():
     items = [
         _make_item("a", [1, 2, 3, 4], datetime(2021, 1, 2, tzinfo=timezone.utc)),
@@ -81,6 +106,7 @@ def test_build_stac_load_kwargs_manual_chunks_and_resolution():
     assert kwargs["groupby"] == "time"
     assert kwargs["resolution"] == 20.0
     assert kwargs["chunks"] == {"x": 256, "y": 128, "time": 2}
+    assert "pool" not in kwargs
 
 
 def test_build_stac_load_kwargs_auto_chunks_no_resolution():
@@ -98,6 +124,30 @@ def test_build_stac_load_kwargs_auto_chunks_no_resolution():
     assert kwargs["groupby"] == "time"
     assert "chunks" not in kwargs
     assert "resolution" not in kwargs
+    assert kwargs["pool"] == LOAD_POOL_SIZE
+
+
+def test_build_stac_load_kwargs_solar_day_groupby():
+    kwargs = build_stac_load_kwargs(
+        bands=["a"],
+        crs="epsg:32633",
+        resolution=None,
+        chunks="auto",
+        chunk_x=256,
+        chunk_y=128,
+        chunk_time=2,
+        groupby="solar_day",
+    )
+    assert kwargs["groupby"] == "solar_day"
+
+
+def test_get_chunk_side_from_widest_measurement():
+    item = _make_item("a", [0, 0, 1, 1], datetime(2021, 1, 1, tzinfo=timezone.utc))
+    item.add_asset("water", Asset(href="file:///tmp/water.tif", extra_fields={"raster:bands": [{"data_type": "uint8"}]}))
+    item.add_asset("ndwi", Asset(href="file:///tmp/ndwi.tif", extra_fields={"raster:bands": [{"data_type": "float32"}]}))
+    itemsize = get_measurement_itemsize(item, ["water", "ndwi"])
+    assert itemsize == 4
+    assert get_chunk_side(16, itemsize) == 2048
 
 
 def test_to_raster_datatype():
@@ -106,6 +156,24 @@ def test_to_raster_datatype():
     assert to_raster_datatype(np.dtype("complex64")) == DataType.OTHER
 
 
+def test_get_coordinate_extent():
+    dataset = SimpleNamespace(y=SimpleNamespace(values=np.array([200.0, 190.0, 180.0])))
+    assert get_coordinate_extent(dataset, "y") == [180.0, 200.0]
+
+
+def test_build_cube_dimensions_time_extent_is_utc():
+    dataset = SimpleNamespace(
+        x=SimpleNamespace(values=np.array([100.0, 110.0])),
+        y=SimpleNamespace(values=np.array([200.0, 190.0])),
+    )
+    dims = build_cube_dimensions(
+        dataset,
+        [datetime(2021, 1, 1, tzinfo=timezone.utc), datetime(2021, 1, 2)],
+    )
+    assert dims["time"]["extent"] == ["2021-01-01T00:00:00Z", "2021-01-02T00:00:00Z"]
+    assert dims["x"]["extent"] == [100.0, 110.0]
+
+
 def test_get_measurement_keys_requires_item_assets():
     collection = SimpleNamespace(item_assets=None)
     with pytest.raises(ValueError, match="must define item_assets"):
@@ -165,6 +233,7 @@ def test_run_to_eopf_uses_collection_measurements_and_load_kwargs(monkeypatch, t
         crs = SimpleNamespace(epsg=32633)
         extent = FakeExtent()
         shape = (2, 3)
+        resolution = SimpleNamespace(x=10.0, y=-10.0)
 
     class FakeDataset:
         def __init__(self):
@@ -193,7 +262,10 @@ def test_run_to_eopf_uses_collection_measurements_and_load_kwargs(monkeypatch, t
         pass
 
     class FakeEOVariable:
+        created = []
+
         def __init__(self, data, dims, attrs):
+            FakeEOVariable.created.append(self)
             self.data = data
             self.dims = dims
             self.attrs = attrs
@@ -201,11 +273,15 @@ def test_run_to_eopf_uses_collection_measurements_and_load_kwargs(monkeypatch, t
     class FakeEOZarrStore:
         last_key = None
         last_url = None
+        last_compressor = None
+        last_to_zarr_kwargs = None
 
         def __init__(self, url):
             self.url = url
 
-        def open(self, mode):
+        def open(self, mode, compressor=None, to_zarr_kwargs=None):
+            FakeEOZarrStore.last_compressor = compressor
+            FakeEOZarrStore.last_to_zarr_kwargs = to_zarr_kwargs
             return self
 
         def __enter__(self):
@@ -225,6 +301,10 @@ def test_run_to_eopf_uses_collection_measurements_and_load_kwargs(monkeypatch, t
     monkeypatch.setattr("stac_eopf_product.writer.EOGroup", FakeEOGroup)
     monkeypatch.setattr("stac_eopf_product.writer.EOVariable", FakeEOVariable)
     monkeypatch.setattr("stac_eopf_product.writer.EOZarrStore", FakeEOZarrStore)
+    monkeypatch.setattr(
+        "stac_eopf_product.writer.zarr.consolidate_metadata",
+        lambda path: captured.setdefault("consolidated", path),
+    )
 
     run_to_eopf(
         stac_catalog=tmp_path,
@@ -239,5 +319,18 @@ def test_run_to_eopf_uses_collection_measurements_and_load_kwargs(monkeypatch, t
     assert captured["kwargs"]["bands"] == ["water", "ndwi"]
     assert captured["kwargs"]["resolution"] == 20.0
     assert captured["kwargs"]["chunks"] == {"x": 128, "y": 64, "time": 1}
+    assert [type(var.data) for var in FakeEOVariable.created] == [DataArray, DataArray]
+    assert FakeEOVariable.created[0].attrs["description"] == "Detected water"
     assert FakeEOZarrStore.last_key == "demo"
     assert FakeEOZarrStore.last_url.startswith("file://")
+    assert FakeEOZarrStore.last_compressor.cname == "zstd"
+    assert FakeEOZarrStore.last_compressor.clevel == 3
+    assert FakeEOZarrStore.last_compressor.shuffle == Blosc.BITSHUFFLE
+    assert FakeEOZarrStore.last_to_zarr_kwargs == {"write_empty_chunks": False}
+
+    assert captured["consolidated"] == str(Path("demo") / "demo.zarr" / "measurements")
+
+    output_collection = Collection.from_file(str(tmp_path / "demo" / "collection.json"))
+    assert output_collection.assets["water"].extra_fields["xarray:open_kwargs"] == {"consolidated": True}
+    water_bands = output_collection.assets["water"].extra_fields["raster:bands"]
+    assert water_bands == [{"data_type": "uint8", "spatial_resolution": 10.0}]
@@ -7,7 +7,10 @@ from stac_zarr.cf import (
 from stac_zarr.cli import to_zarr
 from stac_zarr.contract import (
     extract_crs,
+    get_chunk_side,
+    get_measurement_itemsize,
     get_measurement_keys,
+    get_shard_shape,
     get_spatial_extent,
     get_temporal_extent,
     validate_items_have_measurements,
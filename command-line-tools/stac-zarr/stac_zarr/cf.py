@@ -35,10 +35,11 @@ def write_cf_dataset_members(
     if "time" in da.dims:
         raw_time_vals = da.coords["time"].values if "time" in da.coords else np.arange(da.sizes["time"])
         time_vals, time_attrs = _coerce_time_values(np.asarray(raw_time_vals))
+        # a single chunk keeps opening the time axis to one request
         time_arr = dataset_group.create(
             name="time",
             shape=(time_vals.shape[0],),
-            chunks=(max(1, min(1024, time_vals.shape[0])),),
+            chunks=(max(1, time_vals.shape[0]),),
             dtype=time_vals.dtype,
             overwrite=True,
             dimension_names=["time"],
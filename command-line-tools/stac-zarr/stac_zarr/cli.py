@@ -78,6 +78,25 @@ from stac_zarr.writer import run_to_zarr
     show_default=True,
     help="Chunk size along time dimension when --chunks=manual.",
 )
+@click.option(
+    "--chunk-mb",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Target uncompressed chunk size in MiB when --chunks=manual; overrides --chunk-x/--chunk-y.",
+)
+@click.option(
+    "--shard-mb",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    help="Group chunks into Zarr v3 shards of about this many MiB (uncompressed).",
+)
+@click.option(
+    "--groupby",
+    type=click.Choice(("time", "solar_day"), case_sensitive=False),
+    default="time",
+    show_default=True,
+    help="How items are grouped into time slices. 'solar_day' merges same-day scenes.",
+)
 def to_zarr(
     stac_catalog: Path,
     overview_levels: int,
@@ -88,6 +107,9 @@ def to_zarr(
     chunk_x: int,
     chunk_y: int,
     chunk_time: int,
+    chunk_mb: float | None,
+    shard_mb: float | None,
+    groupby: str,
 ) -> None:
     run_to_zarr(
         stac_catalog=stac_catalog,
@@ -99,4 +121,7 @@ def to_zarr(
         chunk_x=chunk_x,
         chunk_y=chunk_y,
         chunk_time=chunk_time,
+        chunk_mb=chunk_mb,
+        shard_mb=shard_mb,
+        groupby=groupby.lower(),
     )
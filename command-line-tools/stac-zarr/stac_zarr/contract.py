@@ -1,8 +1,13 @@
+import math
+import re
 from datetime import datetime
-from typing import List
+from typing import List, Tuple
 
+import numpy as np
 from pystac import Collection, Item
 
+EPSG_CODE_PATTERN = re.compile(r"^epsg:\d+$", re.IGNORECASE)
+
 
 def extract_crs(item: Item) -> str:
     """Extract CRS from a STAC item."""
@@ -10,7 +15,7 @@ def extract_crs(item: Item) -> str:
     if epsg:
         return f"epsg:{epsg}"
     code = item.properties.get("proj:code")
-    if code and code.upper().startswith("EPSG:"):
+    if code and EPSG_CODE_PATTERN.match(code):
         return code.lower()
     raise ValueError("CRS not found in item properties")
 
@@ -25,16 +30,43 @@ def get_temporal_extent(items: List[Item]) -> List[datetime]:
 
 def get_spatial_extent(items: List[Item]) -> List[float]:
     """Get spatial extent from a list of STAC items."""
-    bboxes = [item.bbox for item in items if item.bbox]
-    if not bboxes:
+    bboxes = np.asarray([item.bbox[:4] for item in items if item.bbox], dtype=np.float64)
+    if not bboxes.size:
         raise ValueError("No bbox found in item properties")
-    min_x = min(bbox[0] for bbox in bboxes)
-    min_y = min(bbox[1] for bbox in bboxes)
-    max_x = max(bbox[2] for bbox in bboxes)
-    max_y = max(bbox[3] for bbox in bboxes)
+    min_x, min_y = bboxes[:, :2].min(axis=0).tolist()
+    max_x, max_y = bboxes[:, 2:].max(axis=0).tolist()
     return [min_x, min_y, max_x, max_y]
 
 
+def get_measurement_itemsize(item: Item, measurement_keys: List[str]) -> int:
+    """Get the widest raster:bands data type size (bytes) among the item measurements."""
+    itemsizes = []
+    for key in measurement_keys:
+        for band in item.assets[key].extra_fields.get("raster:bands") or []:
+            try:
+                itemsizes.append(np.dtype(band["data_type"]).itemsize)
+            except (KeyError, TypeError):
+                continue
+    return max(itemsizes, default=np.dtype(np.float64).itemsize)
+
+
+def get_chunk_side(chunk_mb: float, itemsize: int, chunk_time: int = 1) -> int:
+    """Get the square x/y chunk side holding about chunk_mb MiB per chunk."""
+    return max(1, int(math.sqrt(chunk_mb * 2**20 / (itemsize * chunk_time))))
+
+
+def get_shard_shape(
+    shape: Tuple[int, ...], chunk_shape: Tuple[int, ...], itemsize: int, shard_mb: float
+) -> Tuple[int, ...]:
+    """Get a shard shape grouping whole spatial chunks into about shard_mb MiB."""
+    chunk_bytes = itemsize * math.prod(chunk_shape)
+    factor = max(1, int(math.sqrt(shard_mb * 2**20 / chunk_bytes)))
+    return (chunk_shape[0],) + tuple(
+        min(side * factor, math.ceil(size / side) * side)
+        for size, side in zip(shape[1:], chunk_shape[1:])
+    )
+
+
 def get_measurement_keys(collection: Collection) -> List[str]:
     """Get measurement keys declared in Collection Item Assets."""
     if not collection.item_assets:
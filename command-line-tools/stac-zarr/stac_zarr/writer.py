@@ -23,6 +23,7 @@ from pystac.extensions.datacube import DatacubeExtension
 from pystac.extensions.projection import ProjectionExtension
 from pystac.extensions.raster import RasterBand, RasterExtension
 from xarray import DataArray, Dataset
+from zarr.codecs import BloscCodec
 from zarr.types import AnyArray
 
 from stac_zarr.cf import validate_dataset_group, write_cf_dataset_members
@@ -43,7 +44,10 @@ from stac_zarr.models.multiscales import (
 from stac_zarr.models.spatial import Spatial
 from stac_zarr.contract import (
     extract_crs,
+    get_chunk_side,
+    get_measurement_itemsize,
     get_measurement_keys,
+    get_shard_shape,
     get_spatial_extent,
     get_temporal_extent,
     validate_items_have_measurements,
@@ -52,6 +56,16 @@ from stac_zarr.multiscales import build_tile_matrix_set
 from stac_zarr.reducers import downsample_2x, get_variable_type, to_resampling_method
 
 
+# bit-level shuffling ahead of zstd compresses both the float index rasters
+# and the low-entropy water masks far better than zarr's default zstd
+ZARR_COMPRESSORS = (BloscCodec(cname="zstd", clevel=3, shuffle="bitshuffle"),)
+
+
+def align_to_write_grid(data: dask.array.Array, target: AnyArray) -> dask.array.Array:
+    """Rechunk a Dask array so each block covers whole chunks (or shards) of the target."""
+    return data.rechunk(target.shards or target.chunks)
+
+
 def run_to_zarr(
     stac_catalog: Path,
     overview_levels: int,
@@ -62,6 +76,9 @@ def run_to_zarr(
     chunk_x: int = 512,
     chunk_y: int = 512,
     chunk_time: int = 1,
+    chunk_mb: float | None = None,
+    shard_mb: float | None = None,
+    groupby: str = "time",
 ) -> None:
     logger.info(f"Reading STAC catalog from {stac_catalog}...")
     catalog: STACObject = read_stac_file(os.path.join(stac_catalog, "catalog.json"))
@@ -77,26 +94,36 @@ def run_to_zarr(
             f"{stac_catalog} does not contain a valid STAC Collection instance, found {type(collection)}"
         )
 
-    items: List[Item] = list(collection.get_all_items())
+    items: List[Item] = list(collection.get_items())
     if not items:
         raise ValueError("Input STAC Collection contains no items")
 
     logger.info(f"Found {len(items)} STAC Items in {stac_catalog} STAC Catalog")
     measurement_keys = get_measurement_keys(collection)
     validate_items_have_measurements(items, measurement_keys)
+    if chunks == "manual" and chunk_mb is not None:
+        chunk_x = chunk_y = get_chunk_side(
+            chunk_mb, get_measurement_itemsize(items[0], measurement_keys), chunk_time
+        )
+        logger.info(f"Using {chunk_x}x{chunk_y} spatial chunks for ~{chunk_mb} MiB per chunk")
 
     crs = extract_crs(items[0])
+    temporal_extent = get_temporal_extent(items)
     stac_load_kwargs: Dict[str, Any] = {
         "bands": measurement_keys,
         "crs": crs,
-        "groupby": "time",
+        "groupby": groupby,
     }
     if chunks == "manual":
         stac_load_kwargs["chunks"] = {"x": chunk_x, "y": chunk_y, "time": chunk_time}
+    else:
+        # an empty mapping still loads lazily, with odc.stac picking chunks from
+        # the native tiling of the assets; the writer needs Dask-backed data
+        stac_load_kwargs["chunks"] = {}
     if resolution is not None:
         stac_load_kwargs["resolution"] = resolution
 
-    stac_catalog_dataset: Dataset = stac_load(items, **stac_load_kwargs)
+    stac_catalog_dataset: Dataset = stac_load(items, **stac_load_kwargs).transpose("time", "y", "x")
 
     logger.info("Loaded data using odc.stac")
     logger.info("Serializing the STAC Collection...")
@@ -107,7 +134,7 @@ def run_to_zarr(
         title=collection.title,
         extent=Extent(
             spatial=SpatialExtent(bboxes=[get_spatial_extent(items)]),
-            temporal=TemporalExtent([get_temporal_extent(items)]),
+            temporal=TemporalExtent([temporal_extent]),
         ),
     )
     ProjectionExtension.summaries(output_collection, add_if_missing=True)
@@ -125,15 +152,15 @@ def run_to_zarr(
         )
     )
 
-    spatial_bbox = [
-        float(min(stac_catalog_dataset.x.values)),
-        float(min(stac_catalog_dataset.y.values)),
-        float(max(stac_catalog_dataset.x.values)),
-        float(max(stac_catalog_dataset.y.values)),
-    ]
+    x_vals = stac_catalog_dataset.x.values
+    y_vals = stac_catalog_dataset.y.values
+    x_extent = [float(x_vals.min()), float(x_vals.max())]
+    y_extent = [float(y_vals.min()), float(y_vals.max())]
+    spatial_bbox = [x_extent[0], y_extent[0], x_extent[1], y_extent[1]]
 
     measurement_name = "measurements"
     gbox = stac_catalog_dataset.odc.geobox
+    spatial_resolution = [abs(gbox.resolution.x), abs(gbox.resolution.y)]
     affine_6 = list(gbox.transform)[:6]
     proj_code = f"EPSG:{gbox.crs.epsg}" if gbox.crs.epsg is not None else crs.upper()
 
@@ -148,10 +175,12 @@ def run_to_zarr(
     multiscales_level_shapes: List[List[int]] = []
     default_resampling_method = to_resampling_method(categorical_overview_reducer)
     crs_wkt = gbox.crs.to_wkt("WKT2_2019")
+    write_sources: List[dask.array.Array] = []
+    write_targets: List[AnyArray] = []
 
     for measurement in measurement_keys:
-        logger.info(f"Writing measurement {measurement} to Zarr store...")
-        da: DataArray = stac_catalog_dataset[measurement].transpose("time", "y", "x")
+        logger.info(f"Preparing measurement {measurement} for the Zarr store...")
+        da: DataArray = stac_catalog_dataset[measurement]
         variable_type = get_variable_type(da)
         overview_reducer = (
             continuous_overview_reducer
@@ -161,13 +190,21 @@ def run_to_zarr(
         if variable_type == "continuous":
             default_resampling_method = to_resampling_method(overview_reducer)
 
-        title = collection.item_assets[measurement].title or measurement
-        description = collection.item_assets[measurement].description or ""
+        item_asset = collection.item_assets[measurement]
+        title = item_asset.title or measurement
+        description = item_asset.description or ""
 
+        shards = (
+            get_shard_shape(da.shape, da.data.chunksize, da.dtype.itemsize, shard_mb)
+            if shard_mb is not None
+            else None
+        )
         z: AnyArray = measurements_grp.create(
             name=measurement,
             shape=da.shape,
             chunks=da.data.chunksize,
+            shards=shards,
+            compressors=ZARR_COMPRESSORS,
             dtype=da.dtype,
             overwrite=True,
             attributes={
@@ -179,7 +216,8 @@ def run_to_zarr(
             dimension_names=["time", "y", "x"],
         )
         write_cf_dataset_members(measurements_grp, da, affine_6, crs_wkt)
-        dask.array.store(da.data, z, lock=True)
+        write_sources.append(align_to_write_grid(da.data, z))
+        write_targets.append(z)
         validate_dataset_group(measurements_grp)
 
         bands.append({"name": measurement, "description": description})
@@ -188,10 +226,7 @@ def run_to_zarr(
             RasterBand.create(
                 data_type=da.dtype.name,
                 nodata=None,
-                spatial_resolution=[
-                    abs(da.x.values[1] - da.x.values[0]),
-                    abs(da.y.values[1] - da.y.values[0]),
-                ],
+                spatial_resolution=spatial_resolution,
             )
         )
 
@@ -227,10 +262,17 @@ def run_to_zarr(
                 affine_6[4] * level_scale,
                 affine_6[5],
             ]
+            level_shards = (
+                get_shard_shape(level_da.shape, level_da.data.chunksize, level_da.dtype.itemsize, shard_mb)
+                if shard_mb is not None
+                else None
+            )
             level_array: AnyArray = level_grp.create(
                 name=measurement,
                 shape=level_da.shape,
                 chunks=level_da.data.chunksize,
+                shards=level_shards,
+                compressors=ZARR_COMPRESSORS,
                 dtype=level_da.dtype,
                 overwrite=True,
                 attributes={
@@ -242,7 +284,8 @@ def run_to_zarr(
                 dimension_names=["time", "y", "x"],
             )
             write_cf_dataset_members(level_grp, level_da, level_affine_6, crs_wkt)
-            dask.array.store(level_da.data, level_array, lock=True)
+            write_sources.append(align_to_write_grid(level_da.data, level_array))
+            write_targets.append(level_array)
             validate_dataset_group(level_grp)
 
             datasets.append(
@@ -271,6 +314,12 @@ def run_to_zarr(
             }
         )
 
+    # one store for every band and overview level: the overviews share the
+    # source reads with the base arrays, and blocks aligned to the write grid
+    # never touch the same chunk, so no lock is needed
+    logger.info(f"Writing {len(write_targets)} arrays to the Zarr store...")
+    dask.array.store(write_sources, write_targets, lock=False)
+
     tile_matrix_set = build_tile_matrix_set(
         proj_code=proj_code,
         affine_6=affine_6,
@@ -312,6 +361,10 @@ def run_to_zarr(
         }
     )
 
+    # consolidate the measurements group as well so it can be opened on its own
+    zarr.consolidate_metadata(root.store, path=measurement_name)
+    zarr.consolidate_metadata(root.store)
+
     logger.info(f"Creating STAC asset {zarr_uri}/measurements...")
     zarr_asset: Asset = Asset(
         href=f"{zarr_uri}/measurements",
@@ -319,6 +372,7 @@ def run_to_zarr(
         roles=["data"],
         title="Measurements",
         description="Zarr measurements group",
+        extra_fields={"xarray:open_kwargs": {"consolidated": True}},
     )
     output_collection.add_asset(key="measurements", asset=zarr_asset)
 
@@ -328,25 +382,19 @@ def run_to_zarr(
         "time": {
             "type": "temporal",
             "extent": [
-                get_temporal_extent(items)[0].isoformat().replace("+00:00", "Z"),
-                get_temporal_extent(items)[1].isoformat().replace("+00:00", "Z"),
+                temporal_extent[0].isoformat().replace("+00:00", "Z"),
+                temporal_extent[1].isoformat().replace("+00:00", "Z"),
             ],
         },
         "x": {
             "type": "spatial",
             "axis": "x",
-            "extent": [
-                float(min(stac_catalog_dataset.x.values)),
-                float(max(stac_catalog_dataset.x.values)),
-            ],
+            "extent": x_extent,
         },
         "y": {
             "type": "spatial",
             "axis": "y",
-            "extent": [
-                float(min(stac_catalog_dataset.y.values)),
-                float(max(stac_catalog_dataset.y.values)),
-            ],
+            "extent": y_extent,
         },
     }
 
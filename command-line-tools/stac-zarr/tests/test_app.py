@@ -1,11 +1,14 @@
+import json
 from datetime import datetime, timezone
 from types import SimpleNamespace
 
 import numpy as np
 import pytest
 import zarr
-from pystac import Asset, Collection, Extent, Item, SpatialExtent, TemporalExtent
-from xarray import DataArray
+from odc.geo.geobox import GeoBox
+from odc.geo.xr import xr_zeros
+from pystac import Asset, Catalog, CatalogType, Collection, Extent, Item, SpatialExtent, TemporalExtent
+from xarray import DataArray, Dataset
 
 from stac_zarr.app import (
     _write_cf_dataset_members,
@@ -13,8 +16,12 @@ from stac_zarr.app import (
     check_grid_mapping,
     check_valid_coordinates,
     downsample_2x,
+    get_chunk_side,
+    get_measurement_itemsize,
     get_measurement_keys,
+    get_shard_shape,
     get_variable_type,
+    run_to_zarr,
     to_resampling_method,
     validate_items_have_measurements,
 )
@@ -77,11 +84,12 @@ def test_build_tile_matrix_set():
 
 
 def test_write_cf_dataset_members(tmp_path):
+    # more timestamps than the old 1024-value time chunk, so a single chunk shows
     da = DataArray(
-        np.arange(24, dtype=np.float32).reshape(2, 3, 4),
+        np.zeros((1500, 3, 4), dtype=np.float32),
         dims=["time", "y", "x"],
         coords={
-            "time": np.array(["2021-06-01T00:00:00", "2021-06-02T00:00:00"], dtype="datetime64[s]"),
+            "time": np.datetime64("2021-06-01T00:00:00", "s") + np.arange(1500) * np.timedelta64(1, "D"),
             "y": np.array([1000.0, 990.0, 980.0], dtype=np.float64),
             "x": np.array([200.0, 210.0, 220.0, 230.0], dtype=np.float64),
         },
@@ -99,6 +107,7 @@ def test_write_cf_dataset_members(tmp_path):
     assert "x" in group.array_keys()
     assert "spatial_ref" in group.array_keys()
 
+    assert group["time"].chunks == (1500,)
     assert group["x"].attrs["standard_name"] == "projection_x_coordinate"
     assert group["y"].attrs["standard_name"] == "projection_y_coordinate"
     assert group["spatial_ref"].attrs["crs_wkt"] == "EPSG:32610-WKT"
@@ -190,6 +199,26 @@ def test_validate_items_have_measurements_reports_missing():
         validate_items_have_measurements(items, ["water", "ndwi"])
 
 
+def test_get_measurement_itemsize_uses_widest_raster_band():
+    item = _make_item("a", ["water", "ndwi"])
+    item.assets["water"].extra_fields["raster:bands"] = [{"data_type": "uint8"}]
+    item.assets["ndwi"].extra_fields["raster:bands"] = [{"data_type": "float32"}]
+    assert get_measurement_itemsize(item, ["water", "ndwi"]) == 4
+    assert get_measurement_itemsize(_make_item("b", ["water"]), ["water"]) == 8
+
+
+def test_get_chunk_side():
+    assert get_chunk_side(16, 4) == 2048
+    assert get_chunk_side(16, 4, chunk_time=4) == 1024
+    assert get_chunk_side(1e-9, 8) == 1
+
+
+def test_get_shard_shape_groups_whole_chunks():
+    assert get_shard_shape((3, 10000, 10000), (1, 512, 512), 4, 16) == (1, 2048, 2048)
+    assert get_shard_shape((3, 600, 700), (1, 512, 512), 4, 64) == (1, 1024, 1024)
+    assert get_shard_shape((3, 600, 700), (1, 512, 512), 4, 0.1) == (1, 512, 512)
+
+
 def test_get_variable_type():
     float_da = DataArray(np.array([1.0], dtype=np.float32), dims=["x"])
     int_da = DataArray(np.array([1], dtype=np.uint8), dims=["x"])
@@ -229,3 +258,125 @@ def test_downsample_2x_rejects_unknown_reducer():
     da = DataArray(np.arange(4, dtype=np.float32).reshape(1, 2, 2), dims=["time", "y", "x"])
     with pytest.raises(ValueError, match="Unsupported overview reducer"):
         downsample_2x(da, "p90")
+
+
+def _save_input_catalog(tmp_path):
+    collection = _make_collection(
+        {
+            "water": {"title": "Water", "description": "Detected water"},
+            "ndwi": {"title": "NDWI", "description": "NDWI index"},
+        }
+    )
+    item = _make_item("item-1", ["water", "ndwi"])
+    item.properties["proj:epsg"] = 32633
+    collection.add_item(item)
+    catalog = Catalog(id="root", description="root")
+    catalog.add_child(collection)
+    catalog.normalize_hrefs(str(tmp_path / "input"))
+    catalog.save(catalog_type=CatalogType.SELF_CONTAINED)
+    return tmp_path / "input"
+
+
+def _fake_stac_load(data_vars, calls):
+    """Mimic odc.stac.load: the bands are Dask-backed only when chunks are passed."""
+
+    def fake_stac_load(items, **kwargs):
+        calls.append(kwargs)
+        time = [np.datetime64("2024-01-01T00:00:00", "ns")]
+        dataset = Dataset({name: da.expand_dims(time=time) for name, da in data_vars.items()})
+        return dataset if kwargs.get("chunks") is not None else dataset.compute()
+
+    return fake_stac_load
+
+
+def test_run_to_zarr_saves_collection(monkeypatch, tmp_path):
+    stac_catalog = _save_input_catalog(tmp_path)
+    gbox = GeoBox.from_bbox((500000, 4599960, 500040, 4600000), crs="epsg:32633", resolution=10)
+    data_vars = {
+        "water": xr_zeros(gbox, dtype="uint8", chunks=(2, 2)),
+        "ndwi": xr_zeros(gbox, dtype="float32", chunks=(2, 2)),
+    }
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("stac_zarr.writer.stac_load", _fake_stac_load(data_vars, []))
+
+    run_to_zarr(
+        stac_catalog=stac_catalog,
+        overview_levels=1,
+        continuous_overview_reducer="mean",
+        categorical_overview_reducer="nearest",
+    )
+
+    with open(tmp_path / "c" / "collection.json") as f:
+        saved = json.load(f)
+    raster_bands = saved["assets"]["measurements"]["raster:bands"]
+    assert [band["data_type"] for band in raster_bands] == ["uint8", "float32"]
+    assert all(band["spatial_resolution"] == [10.0, 10.0] for band in raster_bands)
+
+    measurements = zarr.open_group(tmp_path / "c" / "c.zarr" / "measurements", mode="r")
+    assert measurements["water"].shape == (1, 4, 4)
+
+
+def test_run_to_zarr_auto_chunks_loads_lazily(monkeypatch, tmp_path):
+    stac_catalog = _save_input_catalog(tmp_path)
+    gbox = GeoBox.from_bbox((500000, 4599960, 500040, 4600000), crs="epsg:32633", resolution=10)
+    data_vars = {
+        "water": xr_zeros(gbox, dtype="uint8", chunks=(2, 2)),
+        "ndwi": xr_zeros(gbox, dtype="float32", chunks=(2, 2)),
+    }
+    calls = []
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("stac_zarr.writer.stac_load", _fake_stac_load(data_vars, calls))
+
+    run_to_zarr(
+        stac_catalog=stac_catalog,
+        overview_levels=1,
+        continuous_overview_reducer="mean",
+        categorical_overview_reducer="nearest",
+        chunks="auto",
+    )
+
+    assert calls[0]["chunks"] == {}
+    measurements = zarr.open_group(tmp_path / "c" / "c.zarr" / "measurements", mode="r")
+    assert measurements["water"].chunks == (1, 2, 2)
+
+
+def test_run_to_zarr_writes_shards(monkeypatch, tmp_path):
+    stac_catalog = _save_input_catalog(tmp_path)
+    gbox = GeoBox.from_bbox((500000, 4599920, 500080, 4600000), crs="epsg:32633", resolution=10)
+    rng = np.random.default_rng(0)
+    values = {
+        "water": rng.integers(0, 2, size=gbox.shape, dtype="uint8"),
+        "ndwi": rng.uniform(-1, 1, size=gbox.shape).astype("float32"),
+    }
+    data_vars = {
+        name: xr_zeros(gbox, dtype=value.dtype).copy(data=value).chunk({"y": 2, "x": 2})
+        for name, value in values.items()
+    }
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("stac_zarr.writer.stac_load", _fake_stac_load(data_vars, []))
+
+    # ~100 bytes per shard: 2x2 float32 chunks group by two per side, while
+    # the 2x2 uint8 chunks are small enough for one shard to span the array
+    run_to_zarr(
+        stac_catalog=stac_catalog,
+        overview_levels=1,
+        continuous_overview_reducer="mean",
+        categorical_overview_reducer="nearest",
+        shard_mb=1e-4,
+    )
+
+    measurements = zarr.open_group(tmp_path / "c" / "c.zarr" / "measurements", mode="r")
+    assert measurements["water"].chunks == (1, 2, 2)
+    assert measurements["water"].shards == (1, 8, 8)
+    assert measurements["ndwi"].chunks == (1, 2, 2)
+    assert measurements["ndwi"].shards == (1, 4, 4)
+    for name in ("water", "ndwi"):
+        (codec,) = measurements[name].compressors
+        assert (codec.cname.value, codec.clevel, codec.shuffle.value) == ("zstd", 3, "bitshuffle")
+
+    # the lock-free store must keep every 2x2 block of a multi-chunk shard
+    for name, value in values.items():
+        np.testing.assert_array_equal(measurements[name][0], value)
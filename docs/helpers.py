@@ -1,16 +1,70 @@
 import graphviz
 from cwl2puml import to_puml, DiagramType
-from cwltool.main import main as cwlmain
-from cwltool.context import LoadingContext, RuntimeContext
-from cwltool.executors import NoopJobExecutor
+from cwltool.context import LoadingContext
+from cwltool.cwlrdf import printdot
+from cwltool.load_tool import load_tool
 from io import StringIO, BytesIO
-from IPython.display import Markdown, display
+from IPython.display import SVG, Markdown, display
 from eoap_cwlwrap.types import type_to_string
 from cwl_loader import load_cwl_from_location
 from cwl_loader.utils import search_process
+from functools import lru_cache
 from PIL import Image
 from plantuml import deflate_and_encode
-from urllib.request import urlopen
+import os
+import requests
+import shutil
+import subprocess
+
+# set PLANTUML_JAR to render diagrams locally instead of on the PlantUML server
+PLANTUML_JAR = os.environ.get("PLANTUML_JAR")
+
+# one session keeps the connection to the PlantUML server alive between diagrams
+_http = requests.Session()
+
+
+def _fetch_diagram(puml: str) -> bytes:
+    diagram_url = f"https://img.plantuml.biz/plantuml/png/{deflate_and_encode(puml)}"
+    response = _http.get(diagram_url, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+def _render_diagram_locally(puml: str) -> bytes | None:
+    if not PLANTUML_JAR or shutil.which("java") is None:
+        return None
+    result = subprocess.run(
+        ["java", "-jar", PLANTUML_JAR, "-tpng", "-pipe"],
+        input=puml.encode(),
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+@lru_cache(maxsize=32)
+def _render_diagram(puml: str) -> bytes:
+    # the PUML source is a deterministic function of the CWL, so it is a stable cache key
+    png = _render_diagram_locally(puml)
+    if png is None:
+        png = _fetch_diagram(puml)
+    return png
+
+
+@lru_cache(maxsize=64)
+def _cwl_dot(cwl_file, entrypoint, mtime):
+    # mtime is only part of the cache key, so editing the CWL file invalidates the entry
+    tool = load_tool(f"{cwl_file}#{entrypoint}", LoadingContext())
+
+    stream_out = StringIO()
+    printdot(tool, tool.doc_loader.ctx, stream_out)
+
+    return stream_out.getvalue()
+
+
+@lru_cache(maxsize=64)
+def _dot_to_svg(dot: str) -> bytes:
+    return graphviz.Source(dot).pipe(format="svg")
 
 
 class WorkflowViewer:
@@ -20,6 +74,8 @@ class WorkflowViewer:
         self.entrypoint = entrypoint
         self.output = ".wrapped.cwl"
         self.base_url = "https://raw.githubusercontent.com/eoap/application-package-patterns/refs/heads/main"
+        self._processes = {}
+        self._pumls = {}
 
     @staticmethod
     def from_file(cwl_file, entrypoint):
@@ -30,21 +86,36 @@ class WorkflowViewer:
     def from_reference(cwl_file, workflow, entrypoint):
         return WorkflowViewer(cwl_file, workflow, entrypoint)
 
+    def _search_process(self, process_id):
+        # the workflow does not change during the viewer's lifetime
+        if process_id not in self._processes:
+            self._processes[process_id] = search_process(process_id=process_id, process=self.workflow)
+        return self._processes[process_id]
+
     def _prepare_headers(self, headers: list[str]):
-        return f"| {' | '.join(headers)} |\n| {' | '.join(["---"] * len(headers))} |\n"
+        separator = " | ".join("---" for _ in headers)
+        return f"| {' | '.join(headers)} |\n| {separator} |\n"
 
     def _display_parameters(self, parameters_name, entrypoint=None):
-        md = self._prepare_headers(["Id", "Type", "Label", "Doc"])
-
         if entrypoint is None:
             entrypoint = self.entrypoint
 
-        wf = search_process(process_id=entrypoint, process=self.workflow)
+        wf = self._search_process(entrypoint)
 
-        for p in getattr(wf, parameters_name, []):
-            md += f"| `{p.id}` | `{type_to_string(p.type_)}` | {p.label} | {p.doc} |\n"
+        parameters = getattr(wf, parameters_name, [])
 
-        display(Markdown(md))
+        # parameters often share type objects, convert each one once
+        type_names = {}
+        for p in parameters:
+            if id(p.type_) not in type_names:
+                type_names[id(p.type_)] = type_to_string(p.type_)
+
+        rows = [
+            f"| `{p.id}` | `{type_names[id(p.type_)]}` | {p.label} | {p.doc} |\n"
+            for p in parameters
+        ]
+
+        display(Markdown(self._prepare_headers(["Id", "Type", "Label", "Doc"]) + "".join(rows)))
 
     def display_inputs(self, entrypoint=None):
         self._display_parameters("inputs", entrypoint=entrypoint)
@@ -53,38 +124,35 @@ class WorkflowViewer:
         self._display_parameters("outputs", entrypoint=entrypoint)
 
     def display_steps(self):
-        md = self._prepare_headers(["Id", "Runs", "Label", "Doc"])
-
-        for step in search_process(
-            process_id=self.entrypoint, process=self.workflow
-        ).steps:
-            md += f"| `{step.id.replace(f'file:///#{self.entrypoint}/', '')}` | `{step.run}` | {step.label} | {step.doc} |\n"
+        prefix = f"file:///#{self.entrypoint}/"
+        rows = [
+            f"| `{step.id.replace(prefix, '')}` | `{step.run}` | {step.label} | {step.doc} |\n"
+            for step in self._search_process(self.entrypoint).steps
+        ]
 
-        display(Markdown(md))
+        display(Markdown(self._prepare_headers(["Id", "Runs", "Label", "Doc"]) + "".join(rows)))
 
     def _display_puml(self, diagram_type: DiagramType, wf, workflow_id=None):
 
-        out = StringIO()
-        to_puml(
-            cwl_document=wf,
-            diagram_type=diagram_type,
-            output_stream=out,
-            workflow_id=workflow_id,
-        )
-
-        clear_output = out.getvalue()
-        encoded = deflate_and_encode(clear_output)
-
-        diagram_url = f"https://img.plantuml.biz/plantuml/png/{encoded}"
-
-        with urlopen(diagram_url) as url:
-            img = Image.open(BytesIO(url.read()))
+        # wf is either self.workflow or a memoized process, so its id is stable
+        key = (diagram_type, id(wf), workflow_id)
+        if key not in self._pumls:
+            out = StringIO()
+            to_puml(
+                cwl_document=wf,
+                diagram_type=diagram_type,
+                output_stream=out,
+                workflow_id=workflow_id,
+            )
+            self._pumls[key] = out.getvalue()
+
+        img = Image.open(BytesIO(_render_diagram(self._pumls[key])), formats=["PNG"])
         display(img)
 
     def display_components_diagram(self, entrypoint=None):
 
         if entrypoint is not None:
-            wf = search_process(process_id=entrypoint, process=self.workflow)
+            wf = self._search_process(entrypoint)
         else:
             wf = self.workflow
             entrypoint = self.entrypoint
@@ -95,22 +163,11 @@ class WorkflowViewer:
         if entrypoint is None:
             entrypoint = self.entrypoint
 
-        wf = search_process(process_id=entrypoint, process=self.workflow)
+        wf = self._search_process(entrypoint)
         self._display_puml(DiagramType.CLASS, wf=wf, workflow_id=entrypoint)
 
     def plot(self):
-        args = ["--print-dot", f"{self.cwl_file}#{self.entrypoint}"]
-
-        stream_err = StringIO()
-        stream_out = StringIO()
-
-        _ = cwlmain(
-            args,
-            stdout=stream_out,
-            stderr=stream_err,
-            executor=NoopJobExecutor(),
-            loadingContext=LoadingContext(),
-            runtimeContext=RuntimeContext(),
-        )
-
-        return graphviz.Source(stream_out.getvalue())
+        # remote documents are versioned release assets, only local files can change
+        mtime = os.path.getmtime(self.cwl_file) if os.path.exists(self.cwl_file) else None
+        # render once to SVG so redisplaying the graph does not run dot again
+        return SVG(data=_dot_to_svg(_cwl_dot(self.cwl_file, self.entrypoint, mtime)))